@@ -1,11 +1,15 @@
 from agentic_memory.core import AgenticMemorySystem
 from utils import call_llm
 from experience import ExperienceManager
+from agentic_memory.snapshot import split_state, prefix_state
+import numpy as np
 import time
 import re
 
 class ZootopiaAgent:
-    def __init__(self, name, persona, speech_style, is_slow=False):
+    def __init__(self, name, persona, speech_style, is_slow=False, memory_backend="chroma", memory_mode="staged",
+                 link_distance_threshold=None, dedup_distance_threshold=None,
+                 db_path="./db", encoder=None, exp_manager=None):
         self.name = name
         self.persona = persona
         self.speech_style = speech_style
@@ -14,14 +18,26 @@ class ZootopiaAgent:
         safe_name = name.replace(" ", "_")
         
         # 1. 记忆系统 (A-MEM)
-        self.memory = AgenticMemorySystem(agent_name=safe_name)
+        # memory_backend: "chroma" (默认) 或 "numpy" (轻量级内存映射向量库)
+        # memory_mode: "staged" (默认，三次 LLM 调用) 或 "fused" (一次结构化调用完成 Note/Link/Evolve)
+        # link_distance_threshold / dedup_distance_threshold: 相似度门控与近重复抑制 (None 表示不启用)
+        self.memory = AgenticMemorySystem(
+            agent_name=safe_name,
+            db_path=db_path,
+            backend=memory_backend,
+            mode=memory_mode,
+            link_distance_threshold=link_distance_threshold,
+            dedup_distance_threshold=dedup_distance_threshold,
+            encoder=encoder
+        )
         
         # 2. 经验系统 (CFGM)
         # 注意：ExperienceManager 内部会加载模型，如果创建多个 Agent，
         # 为了节省内存，可以在 main.py 创建一个全局 manager 传进来。
         # 但为了代码解耦，这里每个 Agent 实例化一个也可以，
         # 因为 SentenceTransformer 内部有缓存机制，不会重复下载模型。
-        self.exp_manager = ExperienceManager()
+        # (service.py 会传入共享的 encoder 与 exp_manager，以便跨 Agent 合批)
+        self.exp_manager = exp_manager if exp_manager is not None else ExperienceManager(db_path=db_path, encoder=encoder)
 
     def perceive(self, event):
         """
@@ -38,28 +54,53 @@ class ZootopiaAgent:
         # 3. 存入 A-MEM (Core Logic)
         self.memory.add_memory(clean_event)
 
-    def think_and_act(self, current_context):
+    def save_snapshot(self, path):
         """
-        核心循环：检索记忆 -> 思考(CoT) -> 说话
+        将该角色的记忆 (A-MEM) 导出为单个 .npz 文件
+        之后可用 load_snapshot 在毫秒级恢复，无需任何 LLM 调用
+        (经验库为场景共享，用 ExperienceManager.save_snapshot 单独保存一份)
+        """
+        np.savez_compressed(path, **prefix_state(self.memory.export_state(), "memory."))
+        print(f"💾 [{self.name}] 记忆快照已保存 -> {path}")
+
+    def load_snapshot(self, path):
+        """从 save_snapshot 生成的 .npz 恢复记忆 (覆盖当前状态)"""
+        with np.load(path) as arrays:
+            self.memory.import_state(split_state(arrays, "memory."))
+        print(f"📂 [{self.name}] 已从快照恢复 {self.memory.collection.count()} 条记忆 <- {path}")
+
+    def recall(self, current_context):
+        """
+        检索阶段：A-MEM 记忆 + CFGM 经验锦囊
+        (可由 RetrievalPrefetcher 在其他角色发言时提前执行)
         """
         # 1. A-MEM 记忆检索 (Retrieve Relevant Memories)
         related_memories = self.memory.retrieve(current_context, k=3)
+
+        # 2. CFGM 经验检索 (Retrieve Relevant Tips via Vector Search)
+        # 这里的 k=2 表示只取最相关的 2 条锦囊，避免 Prompt 过长
+        retrieved_tips = self.exp_manager.retrieve_relevant_tips(current_context, self.name, k=2)
+        return related_memories, retrieved_tips
+
+    def think_and_act(self, current_context, recalled=None):
+        """
+        核心循环：检索记忆 -> 思考(CoT) -> 说话
+        :param recalled: 预取的 (related_memories, retrieved_tips)，为 None 时现场检索
+        """
+        # 1. 检索记忆与经验锦囊
+        related_memories, retrieved_tips = recalled if recalled is not None else self.recall(current_context)
         memory_text = "\n".join([
             f"- [标签:{','.join(m['tags'])}] {m['content']} (背景:{m['context']})" 
             for m in related_memories
         ])
 
-        # 2. CFGM 经验检索 (Retrieve Relevant Tips via Vector Search)
-        # 这里的 k=2 表示只取最相关的 2 条锦囊，避免 Prompt 过长
-        retrieved_tips = self.exp_manager.retrieve_relevant_tips(current_context, self.name, k=2)
-        
         tips_text = ""
         if retrieved_tips:
             tips_text = "【🌟 经验锦囊 (Relevant Tips)】\n" + "\n".join([f"💡 {tip}" for tip in retrieved_tips])
         else:
             tips_text = "（暂无相关经验提示）"
 
-        # 3. 构建 Prompt
+        # 2. 构建 Prompt
         prompt = f"""
         【角色设定】
         你是 {self.name}。
@@ -85,10 +126,10 @@ class ZootopiaAgent:
         (你的回复)
         """
 
-        # 4. 调用大模型
+        # 3. 调用大模型
         full_response = call_llm(prompt)
         
-        # 5. 解析输出
+        # 4. 解析输出
         thought = "（未检测到思考过程）"
         speech = full_response
 
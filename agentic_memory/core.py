@@ -3,22 +3,83 @@ import uuid
 import json
 import time
 import os
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Optional
 # 强制使用国内镜像
 os.environ["HF_ENDPOINT"] = "https://hf-mirror.com"
 from sentence_transformers import SentenceTransformer
-from .prompts import NOTE_CONSTRUCTION_PROMPT, LINK_GENERATION_PROMPT, MEMORY_EVOLUTION_PROMPT
+from .prompts import (
+    NOTE_CONSTRUCTION_PROMPT, LINK_GENERATION_PROMPT, MEMORY_EVOLUTION_PROMPT,
+    FUSED_MEMORY_PROMPT, FUSED_MEMORY_SCHEMA
+)
+from .store import NumpyVectorStore
+from .snapshot import export_collection, import_collection, clear_collection
 from utils import call_llm 
 
+MEMORY_BACKENDS = ("chroma", "numpy")
+MEMORY_MODES = ("staged", "fused")
+
 class AgenticMemorySystem:
-    def __init__(self, agent_name: str, db_path: str = "./db"):
+    def __init__(self, agent_name: str, db_path: str = "./db", backend: str = "chroma", mode: str = "staged",
+                 link_distance_threshold: Optional[float] = None, dedup_distance_threshold: Optional[float] = None,
+                 encoder=None):
+        """
+        :param backend: 向量库后端。"chroma" 使用 ChromaDB 持久化 + HNSW；
+                        "numpy" 使用进程内 float16 内存映射矩阵 + 精确 top-k (适合小而频繁写入的个人记忆)
+        :param mode: 写入流程。"staged" 为三次独立调用 (Note / Link / Evolve)；
+                     "fused" 为一次结构化调用，校验失败时回退到 "staged"
+        :param link_distance_threshold: 相似度门控。原始内容与最近邻的距离 (平方 L2) 超过该值时跳过 Link / Evolve。
+                                        None 表示不启用 (只要有邻居就执行)，参考值 1.2
+        :param dedup_distance_threshold: 近重复抑制。新内容与已有记忆原文的距离低于该值时不再新建笔记，
+                                         而是为已有记忆累加 repeat_count。None 表示不启用，参考值 0.05
+        :param encoder: 可选的共享 Embedding 模型 (需提供 encode 方法)，None 时自行加载
+        """
+        if backend not in MEMORY_BACKENDS:
+            raise ValueError(f"Unknown memory backend: {backend} (expected one of {MEMORY_BACKENDS})")
+        if mode not in MEMORY_MODES:
+            raise ValueError(f"Unknown memory mode: {mode} (expected one of {MEMORY_MODES})")
         self.agent_name = agent_name
+        self.backend = backend
+        self.mode = mode
+        self.link_distance_threshold = link_distance_threshold
+        self.dedup_distance_threshold = dedup_distance_threshold
+
+        # 写入流程的统计指标 (见 get_metrics)
+        self.metrics = {
+            "notes_received": 0,     # add_memory 调用次数
+            "notes_stored": 0,       # 实际新建的笔记数
+            "duplicates_merged": 0,  # 被近重复抑制合并的次数
+            "link_gate_checks": 0,   # 存在邻居、需要门控判断的次数
+            "link_gate_skipped": 0,  # 因最近邻太远而跳过 Link / Evolve 的次数
+            "llm_calls": 0,          # 实际发出的 LLM 调用
+            "llm_calls_saved": 0     # 门控 / 去重节省的 LLM 调用
+        }
+
+        # 记忆库版本号：每次写入 (新增 / 进化 / 合并) 后递增，用于判断预取的检索结果是否过期
+        self.version = 0
         
-        print(f"[{self.agent_name}] 正在加载 Embedding 模型...")
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
+        if encoder is not None:
+            self.encoder = encoder
+        else:
+            print(f"[{self.agent_name}] 正在加载 Embedding 模型...")
+            self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
         
-        self.client = chromadb.PersistentClient(path=db_path)
-        self.collection = self.client.get_or_create_collection(name=f"amem_{agent_name}")
+        if backend == "numpy":
+            self.client = None
+            self.collection = NumpyVectorStore(path=os.path.join(db_path, f"npstore_amem_{agent_name}"))
+        else:
+            self.client = chromadb.PersistentClient(path=db_path)
+            self.collection = self.client.get_or_create_collection(name=f"amem_{agent_name}")
+
+    def export_state(self) -> Dict[str, Any]:
+        """导出完整记忆状态 (文档 / 向量 / metadata / 链接图)，用于快照"""
+        return export_collection(self.collection)
+
+    def import_state(self, state: Dict[str, Any]):
+        """用快照覆盖当前记忆库 (不调用 LLM)"""
+        clear_collection(self.collection)
+        import_collection(self.collection, state)
+        self.version += 1
 
     def _get_embedding(self, text: str) -> List[float]:
         return self.encoder.encode(text).tolist()
@@ -46,23 +107,123 @@ class AgenticMemorySystem:
                 print(f"⚠️ Critical JSON Error: {e}")
                 return {}
 
+    def _call_json_llm(self, prompt: str, json_schema: Dict = None) -> Dict:
+        self.metrics["llm_calls"] += 1
+        raw = call_llm(
+            prompt,
+            system_prompt="You are a helpful AI assistant specialized in text analysis and JSON generation.",
+            json_mode=True,
+            json_schema=json_schema
+        )
+        return self._parse_json_response(raw)
+
     def add_memory(self, content: str, timestamp: float = None):
         """
-        A-MEM 核心写入流程：Note -> Link -> Evolve -> Store
+        A-MEM 核心写入流程：(Dedup) -> Note -> Link -> Evolve -> Store
+        mode="fused" 时先用原始内容检索邻居，再用一次结构化调用同时完成 Note / Link / Evolve
         """
         if timestamp is None:
             timestamp = time.time()
+        self.metrics["notes_received"] += 1
+
+        # LLM 调用次数基准：分阶段 3 次 (Note / Link / Evolve)，单次调用模式 1 次
+        full_calls = 1 if self.mode == "fused" else 3
+
+        # 原始内容的邻居：供去重、相似度门控和单次调用模式共用
+        raw_neighbors = []
+        if self.mode == "fused" or self.link_distance_threshold is not None or self.dedup_distance_threshold is not None:
+            raw_embedding = self._get_embedding(content)
+            raw_neighbors = self._query(raw_embedding, k=3)
+
+            # === Phase 0: Near-duplicate Suppression (近重复抑制) ===
+            if self.dedup_distance_threshold is not None and raw_neighbors:
+                duplicate = self._find_duplicate(content, raw_embedding, raw_neighbors)
+                # 合并失败 (例如记录已不存在) 时按普通流程新建笔记，避免丢失这条内容
+                if duplicate is not None and self._merge_duplicate(duplicate, timestamp):
+                    self.metrics["duplicates_merged"] += 1
+                    self.metrics["llm_calls_saved"] += full_calls
+                    return
+
+        # === 相似度门控：最近邻足够近才执行 Link / Evolve ===
+        link = True
+        if self.link_distance_threshold is not None and raw_neighbors:
+            self.metrics["link_gate_checks"] += 1
+            if raw_neighbors[0]["score"] > self.link_distance_threshold:
+                link = False
+                self.metrics["link_gate_skipped"] += 1
+                self.metrics["llm_calls_saved"] += full_calls - 1
+                print(f"⏭️ [{self.agent_name}] 最近邻距离 {raw_neighbors[0]['score']:.3f} 超过门限，跳过 Link / Evolve")
 
         print(f"🧠 [{self.agent_name}] 正在构建结构化笔记 (A-MEM Processing)...")
-        
+
+        note = None
+        if self.mode == "fused" and link:
+            note = self._fused_pipeline(content, raw_neighbors)
+            if note is None:
+                print(f"⚠️ [{self.agent_name}] 单次调用结果未通过校验，回退到分阶段流程")
+        if note is None:
+            note = self._staged_pipeline(content, link=link)
+
+        # === Phase 4: Storage (落库) ===
+        self.collection.add(
+            documents=[content],
+            embeddings=[note["embedding"]],
+            metadatas=[{
+                "context": note["context"],
+                "keywords": ",".join(note["keywords"]),
+                "tags": ",".join(note["tags"]),
+                "linked_ids": ",".join(note["linked_ids"]),
+                "timestamp": timestamp,
+                "repeat_count": 1
+            }],
+            ids=[str(uuid.uuid4())]
+        )
+        self.version += 1
+        self.metrics["notes_stored"] += 1
+        print(f"✅ 记忆已存储 [Tags: {note['tags']}]")
+
+    def _find_duplicate(self, content: str, raw_embedding: List[float], neighbors: List[Dict]) -> Optional[Dict]:
+        """
+        在候选邻居中寻找近重复记忆
+        库中向量基于 rich_text (含 context / keywords)，不能直接与原始内容比较，
+        因此对候选邻居的原文重新编码 (一次批量 encode)，在原文空间里计算距离
+        """
+        for n in neighbors:
+            if n["content"] == content:
+                return n
+
+        candidate_embeddings = self.encoder.encode([n["content"] for n in neighbors])
+        distances = np.sum((candidate_embeddings - np.asarray(raw_embedding)) ** 2, axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] <= self.dedup_distance_threshold:
+            return neighbors[best]
+        return None
+
+    def _merge_duplicate(self, target: Dict, timestamp: float) -> bool:
+        """为已有记忆累加 repeat_count；记录不存在时返回 False"""
+        existing_record = self.collection.get(ids=[target["id"]])
+        if not existing_record or not existing_record['metadatas']:
+            return False
+        metadata = existing_record['metadatas'][0]
+        metadata["repeat_count"] = int(metadata.get("repeat_count", 1)) + 1
+        metadata["last_seen"] = timestamp
+        self.collection.update(ids=[target["id"]], metadatas=[metadata])
+        self.version += 1
+        print(f"🔁 [{self.agent_name}] 近重复记忆已合并: ID:{target['id'][:4]} (重复 {metadata['repeat_count']} 次)")
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """写入流程统计：门控命中率、去重命中率与节省的 LLM 调用数"""
+        m = dict(self.metrics)
+        m["dedup_hit_rate"] = m["duplicates_merged"] / m["notes_received"] if m["notes_received"] else 0.0
+        m["link_gate_skip_rate"] = m["link_gate_skipped"] / m["link_gate_checks"] if m["link_gate_checks"] else 0.0
+        return m
+
+    def _staged_pipeline(self, content: str, link: bool = True) -> Dict:
+        """分阶段流程：三次独立的 LLM 调用 (Note / Link / Evolve)。link=False 时只做 Note"""
         # === Phase 1: Note Construction (笔记构造) ===
         prompt = NOTE_CONSTRUCTION_PROMPT.format(content=content)
-        raw_analysis = call_llm(
-            prompt, 
-            system_prompt="You are a helpful AI assistant specialized in text analysis and JSON generation.",
-            json_mode=True
-        )
-        note_data = self._parse_json_response(raw_analysis)
+        note_data = self._call_json_llm(prompt)
         
         context = note_data.get("context", content[:50])
         keywords = note_data.get("keywords", [])
@@ -71,10 +232,9 @@ class AgenticMemorySystem:
         # 构建 Embedding
         rich_text = f"{content} | Context: {context} | Keywords: {', '.join(keywords)}"
         embedding = self._get_embedding(rich_text)
-        new_id = str(uuid.uuid4())
 
         # === Phase 2: Link Generation (动态链接) ===
-        neighbors = self.retrieve(query=rich_text, k=3)
+        neighbors = self.retrieve(query=rich_text, k=3) if link else []
         linked_ids = []
         
         if neighbors:
@@ -82,86 +242,141 @@ class AgenticMemorySystem:
             link_prompt = LINK_GENERATION_PROMPT.format(
                 new_context=context, new_content=content, new_keywords=keywords, neighbors_info=neighbors_info
             )
-            
-            link_res_raw = call_llm(
-                link_prompt,
-                system_prompt="You are a helpful AI assistant specialized in text analysis and JSON generation.",
-                json_mode=True
-            )
-            link_res = self._parse_json_response(link_res_raw)
+            link_res = self._call_json_llm(link_prompt)
             linked_ids = link_res.get("linked_memory_ids", [])
 
         # === Phase 3: Memory Evolution (记忆进化 - 真实更新版) ===
         if neighbors:
             evolve_prompt = MEMORY_EVOLUTION_PROMPT.format(new_content=content, neighbors_info=neighbors_info)
-            evolve_res_raw = call_llm(
-                evolve_prompt,
-                system_prompt="You are a helpful AI assistant specialized in text analysis and JSON generation.",
-                json_mode=True
-            )
-            evolve_res = self._parse_json_response(evolve_res_raw)
-            updates = evolve_res.get("updates", [])
-            
-            for update in updates:
-                target_id = update.get("id")
-                if target_id:
-                    # 1. 先从数据库获取当前的完整 Metadata (防止覆盖丢失 timestamp 等字段)
-                    existing_record = self.collection.get(ids=[target_id])
+            evolve_res = self._call_json_llm(evolve_prompt)
+            self._apply_evolution(evolve_res.get("updates", []))
+
+        return {"context": context, "keywords": keywords, "tags": tags, "linked_ids": linked_ids, "embedding": embedding}
+
+    def _fused_pipeline(self, content: str, neighbors: List[Dict]) -> Optional[Dict]:
+        """单次调用流程：原始内容检索到的邻居 -> 一次结构化 LLM 调用。校验失败返回 None"""
+        # 1. 邻居由 add_memory 用原始内容的向量预先检索 (此时还没有 context / keywords)
+        neighbors_info = json.dumps([{ 'id': n['id'], 'content': n['content'], 'context': n['context'] } for n in neighbors], ensure_ascii=False)
+
+        # 2. 一次调用同时返回 keywords / context / tags / links / updates
+        prompt = FUSED_MEMORY_PROMPT.format(content=content, neighbors_info=neighbors_info)
+        result = self._validate_fused_response(
+            self._call_json_llm(prompt, json_schema=FUSED_MEMORY_SCHEMA),
+            neighbor_ids={n['id'] for n in neighbors}
+        )
+        if result is None:
+            return None
+
+        self._apply_evolution(result["updates"])
+
+        # 3. 与分阶段流程一致：落库向量基于 rich_text
+        rich_text = f"{content} | Context: {result['context']} | Keywords: {', '.join(result['keywords'])}"
+        return {
+            "context": result["context"],
+            "keywords": result["keywords"],
+            "tags": result["tags"],
+            "linked_ids": result["linked_memory_ids"],
+            "embedding": self._get_embedding(rich_text)
+        }
+
+    def _validate_fused_response(self, data: Dict, neighbor_ids: set) -> Optional[Dict]:
+        """
+        按 FUSED_MEMORY_SCHEMA 校验单次调用的结果
+        - 结构性错误 (缺字段 / 类型不对) 返回 None，由调用方回退
+        - 引用了不存在的邻居 ID 的 link / update 直接丢弃
+        """
+        def is_str_list(value):
+            return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+        if not isinstance(data, dict):
+            return None
+        for field in FUSED_MEMORY_SCHEMA["required"]:
+            if field not in data:
+                return None
+        context = data["context"]
+        if not isinstance(context, str) or not context.strip():
+            return None
+        if not (is_str_list(data["keywords"]) and is_str_list(data["tags"]) and is_str_list(data["linked_memory_ids"])):
+            return None
+        if not isinstance(data["updates"], list):
+            return None
+
+        updates = []
+        for update in data["updates"]:
+            # id 可能是列表 / 字典等不可哈希的值，先检查类型再查集合
+            if not isinstance(update, dict) or not isinstance(update.get("id"), str) or update["id"] not in neighbor_ids:
+                continue
+            new_context = update.get("new_context")
+            if new_context is not None and not isinstance(new_context, str):
+                continue
+            new_tags = update.get("new_tags")
+            if new_tags is not None and not (is_str_list(new_tags) or isinstance(new_tags, str)):
+                continue
+            updates.append(update)
+
+        return {
+            "context": context,
+            "keywords": data["keywords"],
+            "tags": data["tags"],
+            "linked_memory_ids": [i for i in data["linked_memory_ids"] if i in neighbor_ids],
+            "updates": updates
+        }
+
+    def _apply_evolution(self, updates: List[Dict]):
+        for update in updates:
+            target_id = update.get("id")
+            if target_id:
+                # 1. 先从数据库获取当前的完整 Metadata (防止覆盖丢失 timestamp 等字段)
+                existing_record = self.collection.get(ids=[target_id])
+                
+                if existing_record and existing_record['metadatas']:
+                    current_metadata = existing_record['metadatas'][0]
                     
-                    if existing_record and existing_record['metadatas']:
-                        current_metadata = existing_record['metadatas'][0]
-                        
-                        # 2. 准备更新的数据
-                        new_context_val = update.get('new_context')
-                        new_tags_val = update.get('new_tags')
-                        
-                        has_change = False
+                    # 2. 准备更新的数据
+                    new_context_val = update.get('new_context')
+                    new_tags_val = update.get('new_tags')
+                    
+                    has_change = False
+                    
+                    # 更新 Context
+                    if new_context_val and new_context_val != current_metadata.get('context'):
+                        print(f"🧬 [{self.agent_name}] 记忆进化: ID:{target_id[:4]} Context 更新 -> {str(new_context_val)[:30]}...")
+                        current_metadata['context'] = new_context_val
+                        has_change = True
                         
-                        # 更新 Context
-                        if new_context_val and new_context_val != current_metadata.get('context'):
-                            print(f"🧬 [{self.agent_name}] 记忆进化: ID:{target_id[:4]} Context 更新 -> {str(new_context_val)[:30]}...")
-                            current_metadata['context'] = new_context_val
-                            has_change = True
+                    # 更新 Tags
+                    if new_tags_val:
+                        # 确保格式统一为逗号分隔的字符串
+                        if isinstance(new_tags_val, list):
+                            new_tags_str = ",".join(new_tags_val)
+                        else:
+                            new_tags_str = str(new_tags_val)
                             
-                        # 更新 Tags
-                        if new_tags_val:
-                            # 确保格式统一为逗号分隔的字符串
-                            if isinstance(new_tags_val, list):
-                                new_tags_str = ",".join(new_tags_val)
-                            else:
-                                new_tags_str = str(new_tags_val)
-                                
-                            if new_tags_str != current_metadata.get('tags'):
-                                print(f"🏷️ [{self.agent_name}] 标签进化: ID:{target_id[:4]} Tags 更新 -> {new_tags_str}")
-                                current_metadata['tags'] = new_tags_str
-                                has_change = True
-                        
-                        # 3. 执行真实的 Update 操作
-                        if has_change:
-                            self.collection.update(
-                                ids=[target_id],
-                                metadatas=[current_metadata]
-                                # 注意：我们只更新 metadata，保持原始 embedding 不变，
-                                # 这样既保留了原始记忆的“物理位置”，又更新了它的“语义解释”。
-                            )
+                        if new_tags_str != current_metadata.get('tags'):
+                            print(f"🏷️ [{self.agent_name}] 标签进化: ID:{target_id[:4]} Tags 更新 -> {new_tags_str}")
+                            current_metadata['tags'] = new_tags_str
+                            has_change = True
+                    
+                    # 3. 执行真实的 Update 操作
+                    if has_change:
+                        self.collection.update(
+                            ids=[target_id],
+                            metadatas=[current_metadata]
+                            # 注意：我们只更新 metadata，保持原始 embedding 不变，
+                            # 这样既保留了原始记忆的“物理位置”，又更新了它的“语义解释”。
+                        )
+                        self.version += 1
 
-        # === Phase 4: Storage (落库) ===
-        self.collection.add(
-            documents=[content],
-            embeddings=[embedding],
-            metadatas=[{
-                "context": context,
-                "keywords": ",".join(keywords),
-                "tags": ",".join(tags),
-                "linked_ids": ",".join(linked_ids),
-                "timestamp": timestamp
-            }],
-            ids=[new_id]
-        )
-        print(f"✅ 记忆已存储 [Tags: {tags}]")
+    def embed(self, text: str) -> List[float]:
+        """对检索 query 编码 (可提前计算后传给 retrieve 复用)"""
+        return self._get_embedding(text)
+
+    def retrieve(self, query: str, k: int = 5, query_embedding: List[float] = None) -> List[Dict]:
+        if query_embedding is None:
+            query_embedding = self._get_embedding(query)
+        return self._query(query_embedding, k=k)
 
-    def retrieve(self, query: str, k: int = 5) -> List[Dict]:
-        query_embedding = self._get_embedding(query)
+    def _query(self, query_embedding: List[float], k: int = 5) -> List[Dict]:
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=k
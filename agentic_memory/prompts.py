@@ -55,4 +55,57 @@ Return a JSON object with updates for neighbors (only include if updates are nee
         }}
     ]
 }}
-"""
\ No newline at end of file
+"""
+# Single-pass A-MEM: Note + Link + Evolve 合并为一次结构化调用
+# 邻居由原始内容的向量预先检索得到，因此可以在同一个 Prompt 中完成三个阶段
+FUSED_MEMORY_PROMPT = """
+You are an AI memory evolution agent. In a single pass:
+1. Analyze the new content: extract salient keywords (nouns, verbs, key concepts), a one-sentence context, and broad categorical tags.
+2. Decide which of the nearest neighbor memories should be explicitly linked to the new memory (shared themes, causality, or contradiction).
+3. "Evolve" the neighbors: update their context or tags only if the new information changes our understanding of them.
+
+New Content:
+{content}
+
+Nearest Neighbors:
+{neighbors_info}
+
+Return ONLY a JSON object with exactly these fields:
+{{
+    "keywords": ["keyword1", "keyword2", ...], // Order from most to least important. At least 3.
+    "context": "One sentence summarizing main topic, key arguments, and purpose.",
+    "tags": ["tag1", "tag2", ...], // Broad categories/themes. At least 3.
+    "linked_memory_ids": ["id_1", "id_2"], // IDs from neighbors only. Empty list if none.
+    "updates": [ // Only include neighbors that need updates. Empty list if none.
+        {{
+            "id": "neighbor_id",
+            "new_context": "Updated context summary...",
+            "new_tags": ["tag1", "tag2", "new_tag"]
+        }}
+    ]
+}}
+"""
+
+# FUSED_MEMORY_PROMPT 对应的 JSON Schema (用于 response_format 约束输出)
+FUSED_MEMORY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "keywords": {"type": "array", "items": {"type": "string"}},
+        "context": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "linked_memory_ids": {"type": "array", "items": {"type": "string"}},
+        "updates": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "new_context": {"type": "string"},
+                    "new_tags": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["id"]
+            }
+        }
+    },
+    "required": ["keywords", "context", "tags", "linked_memory_ids", "updates"]
+}
@@ -0,0 +1,69 @@
+import json
+from typing import Dict
+
+import numpy as np
+
+# Chroma 单次 add 的批量上限有限，恢复时分批写入
+IMPORT_BATCH = 4096
+
+
+def export_collection(collection) -> Dict[str, np.ndarray]:
+    """
+    导出一个向量集合 (Chroma Collection 或 NumpyVectorStore) 的完整状态
+    - embeddings: float32 矩阵，原样保存以保证恢复后检索结果可复现
+    - records: ids / documents / metadatas 的 UTF-8 编码 JSON 字节 (uint8 数组；metadata 中的 linked_ids 即链接图)
+    全部为普通 ndarray，np.load 时无需 allow_pickle
+    """
+    data = collection.get(include=["documents", "metadatas", "embeddings"])
+    embeddings = data.get("embeddings")
+    if embeddings is None or len(embeddings) == 0:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+    records = {
+        "ids": list(data["ids"]),
+        "documents": list(data["documents"] or []),
+        "metadatas": [dict(m) if m else {} for m in (data["metadatas"] or [])],
+    }
+    return {
+        "embeddings": np.asarray(embeddings, dtype=np.float32),
+        # 不用 numpy 的 unicode 标量：它按 UCS-4 存储，中文文本会膨胀为 UTF-8 的 4/3 倍以上
+        "records": np.frombuffer(json.dumps(records, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+    }
+
+
+def clear_collection(collection):
+    """
+    原地清空集合 (不删除集合本身)
+    其他对象可能仍持有同一个集合的句柄 (例如多个 Agent 共享的经验库)，
+    delete_collection 会让这些句柄指向一个已删除的集合
+    """
+    if hasattr(collection, "reset"):
+        collection.reset()
+        return
+    ids = collection.get(include=[])["ids"]
+    for start in range(0, len(ids), IMPORT_BATCH):
+        collection.delete(ids=ids[start:start + IMPORT_BATCH])
+
+
+def import_collection(collection, state: Dict[str, np.ndarray]):
+    """将 export_collection 导出的状态写入一个空集合"""
+    records = json.loads(np.asarray(state["records"], dtype=np.uint8).tobytes().decode("utf-8"))
+    embeddings = np.asarray(state["embeddings"], dtype=np.float32)
+    ids = records["ids"]
+    for start in range(0, len(ids), IMPORT_BATCH):
+        end = start + IMPORT_BATCH
+        collection.add(
+            ids=ids[start:end],
+            embeddings=embeddings[start:end].tolist(),
+            documents=records["documents"][start:end],
+            # Chroma 不接受空 metadata 字典
+            metadatas=[m or None for m in records["metadatas"][start:end]]
+        )
+
+
+def split_state(arrays, prefix: str) -> Dict[str, np.ndarray]:
+    """从 npz 中取出某个前缀下的键 (例如 "memory." / "tips.")"""
+    return {key[len(prefix):]: arrays[key] for key in arrays.files if key.startswith(prefix)}
+
+
+def prefix_state(state: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    return {f"{prefix}{key}": value for key, value in state.items()}
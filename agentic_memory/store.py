@@ -0,0 +1,287 @@
+import functools
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+def _locked(method):
+    """串行化对集合的读写 (检索预取 / 服务端合批会在后台线程里与 perceive 并发访问同一集合)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class NumpyVectorStore:
+    """
+    轻量级进程内向量库 (Chroma Collection 的替代后端)
+    - 向量：float16 内存映射矩阵 (embeddings.f16)，按容量倍增扩展
+    - 元数据：紧凑的 JSON 旁车文件 (meta.json 快照 + meta.journal 追加日志)，保存 ids / documents / metadatas
+      每次 add / update 只追加一行日志，日志过长或下次打开时合并进快照
+    - 检索：NumPy 精确 top-k (平方 L2 距离，与 Chroma 默认的 l2 空间一致)
+    只实现 AgenticMemorySystem 用到的 Collection 接口：add / get / update / query / count
+    """
+
+    EMBEDDING_FILE = "embeddings.f16"
+    META_FILE = "meta.json"
+    JOURNAL_FILE = "meta.journal"
+    QUERY_BLOCK_ROWS = 8192
+    # 日志累计到该条数后合并进快照 (快照重写是 O(N)，按条数摊还)
+    COMPACT_EVERY_RECORDS = 1000
+
+    def __init__(self, path: str, initial_capacity: int = 64):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        self._emb_path = os.path.join(self.path, self.EMBEDDING_FILE)
+        self._meta_path = os.path.join(self.path, self.META_FILE)
+        self._journal_path = os.path.join(self.path, self.JOURNAL_FILE)
+        self._initial_capacity = initial_capacity
+
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self._matrix = None
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+        self._index: Dict[str, int] = {}
+        self._journal_records = 0
+        self._lock = threading.RLock()
+
+        self._load()
+
+    # ---------- 持久化 ----------
+    def _load(self):
+        # 1. 读取快照
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            self.ids = meta["ids"]
+            self.documents = meta["documents"]
+            self.metadatas = meta["metadatas"]
+            self.dim = meta["dim"]
+
+        # 2. 重放日志 (快照之后的增量写入)，索引先于重放建立并随 add 记录增量维护
+        self._index = {id_: i for i, id_ in enumerate(self.ids)}
+        replayed = 0
+        if os.path.exists(self._journal_path):
+            good_offset = 0
+            torn = False
+            with open(self._journal_path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        good_offset += len(line)
+                        continue
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        torn = True
+                        break
+                    self._apply_record(record)
+                    replayed += 1
+                    good_offset += len(line)
+            if torn:
+                # 进程中途退出可能留下半行：截断到最后一条完整记录，
+                # 否则后续追加会接在这半行后面，重新打开时连同新记录一起丢失
+                print(f"⚠️ [NumpyVectorStore] 日志末尾存在不完整记录，已截断: {self._journal_path}")
+                with open(self._journal_path, 'r+b') as f:
+                    f.truncate(good_offset)
+
+        if self.dim is not None and os.path.exists(self._emb_path):
+            self.capacity = os.path.getsize(self._emb_path) // (self.dim * np.dtype(np.float16).itemsize)
+            if self.capacity > 0:
+                self._matrix = np.memmap(self._emb_path, dtype=np.float16, mode='r+', shape=(self.capacity, self.dim))
+                self._sq_norms = self._row_sq_norms(0, len(self.ids))
+
+        # 3. 合并日志到快照，保持旁车文件紧凑
+        if replayed:
+            self._compact()
+
+    def _apply_record(self, record: Dict[str, Any]):
+        if record["op"] == "add":
+            if record["ids"] and all(id_ in self._index for id_ in record["ids"]):
+                # 合并快照后、删除日志前退出会留下已并入快照的记录，重放时跳过
+                return
+            self.dim = record["dim"]
+            for offset, id_ in enumerate(record["ids"]):
+                self._index[id_] = len(self.ids) + offset
+            self.ids.extend(record["ids"])
+            self.documents.extend(record["documents"])
+            self.metadatas.extend(record["metadatas"])
+        elif record["op"] == "update":
+            for i, id_ in enumerate(record["ids"]):
+                row = self._index.get(id_)
+                if row is None:
+                    continue
+                if record.get("metadatas") is not None:
+                    self.metadatas[row] = record["metadatas"][i]
+                if record.get("documents") is not None:
+                    self.documents[row] = record["documents"][i]
+
+    def _append_record(self, record: Dict[str, Any]):
+        with open(self._journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._journal_records += 1
+        # 长时间运行的进程 (Streamlit / service.py) 不会重新打开集合，日志过长时就地合并
+        if self._journal_records >= self.COMPACT_EVERY_RECORDS:
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "dim": self.dim,
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self._meta_path)
+        if os.path.exists(self._journal_path):
+            os.remove(self._journal_path)
+        self._journal_records = 0
+
+    def _row_sq_norms(self, start: int, end: int) -> np.ndarray:
+        """按块计算 [start, end) 行的平方范数 (基于 float16 落盘后的值，保证与查询时一致)"""
+        norms = np.empty(end - start, dtype=np.float32)
+        for block_start in range(start, end, self.QUERY_BLOCK_ROWS):
+            block_end = min(block_start + self.QUERY_BLOCK_ROWS, end)
+            block = np.asarray(self._matrix[block_start:block_end], dtype=np.float32)
+            norms[block_start - start:block_end - start] = np.einsum('ij,ij->i', block, block)
+        return norms
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self.capacity:
+            return
+        new_capacity = max(self._initial_capacity, self.capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+
+        # 直接扩展底层文件再重新映射，已有行原地保留，无需把整个矩阵读进内存再写回
+        mode = 'r+b' if self.capacity > 0 else 'wb'
+        with open(self._emb_path, mode) as f:
+            f.truncate(new_capacity * self.dim * np.dtype(np.float16).itemsize)
+        self._matrix = np.memmap(self._emb_path, dtype=np.float16, mode='r+', shape=(new_capacity, self.dim))
+        self.capacity = new_capacity
+
+    @_locked
+    def reset(self):
+        """清空集合 (删除向量文件与旁车文件)"""
+        self._matrix = None
+        for path in (self._emb_path, self._meta_path, self._journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.ids, self.documents, self.metadatas = [], [], []
+        self.dim = None
+        self.capacity = 0
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+        self._index = {}
+        self._journal_records = 0
+
+    # ---------- Collection 接口 ----------
+    @_locked
+    def count(self) -> int:
+        return len(self.ids)
+
+    @_locked
+    def add(self, ids: List[str], embeddings: List[List[float]], documents: List[str] = None, metadatas: List[Dict] = None):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError(f"embeddings shape {vectors.shape} does not match {len(ids)} ids")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimensionality {self.dim}")
+        for id_ in ids:
+            if id_ in self._index:
+                raise ValueError(f"ID already exists: {id_}")
+
+        documents = documents if documents is not None else [""] * len(ids)
+        metadatas = metadatas if metadatas is not None else [{} for _ in ids]
+
+        start = len(self.ids)
+        self._ensure_capacity(start + len(ids))
+        self._matrix[start:start + len(ids)] = vectors.astype(np.float16)
+        self._matrix.flush()
+
+        self._sq_norms = np.concatenate([self._sq_norms, self._row_sq_norms(start, start + len(ids))])
+
+        record = {
+            "op": "add",
+            "dim": self.dim,
+            "ids": list(ids),
+            "documents": list(documents),
+            "metadatas": [dict(m) if m else {} for m in metadatas],
+        }
+        self._apply_record(record)
+        self._append_record(record)
+
+    @_locked
+    def get(self, ids: List[str] = None, include: List[str] = None) -> Dict[str, Any]:
+        include = include if include is not None else ["documents", "metadatas"]
+        if ids is None:
+            rows = list(range(len(self.ids)))
+        else:
+            rows = [self._index[id_] for id_ in ids if id_ in self._index]
+
+        result = {"ids": [self.ids[r] for r in rows]}
+        result["documents"] = [self.documents[r] for r in rows] if "documents" in include else None
+        result["metadatas"] = [dict(self.metadatas[r]) for r in rows] if "metadatas" in include else None
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(self._matrix[rows], dtype=np.float32) if rows else np.zeros((0, self.dim or 0), dtype=np.float32)
+        else:
+            result["embeddings"] = None
+        return result
+
+    @_locked
+    def update(self, ids: List[str], metadatas: List[Dict] = None, documents: List[str] = None):
+        record = {
+            "op": "update",
+            "ids": list(ids),
+            "metadatas": [dict(m) for m in metadatas] if metadatas is not None else None,
+            "documents": list(documents) if documents is not None else None,
+        }
+        self._apply_record(record)
+        self._append_record(record)
+
+    @_locked
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10) -> Dict[str, Any]:
+        size = len(self.ids)
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if size == 0:
+            for _ in range(len(queries)):
+                for key in result:
+                    result[key].append([])
+            return result
+
+        k = min(n_results, size)
+        # ||q - e||^2 = ||q||^2 - 2 q·e + ||e||^2
+        # 分块转换为 float32 再做矩阵乘，避免大集合时一次性复制整张 float16 矩阵
+        dots = np.empty((len(queries), size), dtype=np.float32)
+        for start in range(0, size, self.QUERY_BLOCK_ROWS):
+            end = min(start + self.QUERY_BLOCK_ROWS, size)
+            block = np.asarray(self._matrix[start:end], dtype=np.float32)
+            dots[:, start:end] = queries @ block.T
+        q_norms = np.einsum('ij,ij->i', queries, queries)
+        distances = q_norms[:, None] - 2.0 * dots + self._sq_norms[None, :]
+        np.maximum(distances, 0.0, out=distances)
+
+        for row_dist in distances:
+            if k < size:
+                top = np.argpartition(row_dist, k - 1)[:k]
+                top = top[np.argsort(row_dist[top])]
+            else:
+                top = np.argsort(row_dist)
+            result["ids"].append([self.ids[r] for r in top])
+            result["documents"].append([self.documents[r] for r in top])
+            result["metadatas"].append([dict(self.metadatas[r]) for r in top])
+            result["distances"].append([float(row_dist[r]) for r in top])
+        return result
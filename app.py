@@ -1,7 +1,10 @@
 import streamlit as st
+import os
 import time
 import random
-from agent import ZootopiaAgent
+from characters import CHARACTERS_CONFIG, create_agent
+from prefetch import RetrievalPrefetcher
+from service_client import connect_agents
 
 # === 页面配置 ===
 st.set_page_config(
@@ -35,59 +38,56 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# === 1. 角色配置 (在此处添加更多角色) ===
-CHARACTERS_CONFIG = [
-    {
-        "name": "Judy_Hopps",
-        "avatar": "🐰",
-        "persona": "你是一只来自兔窝镇的兔子警官，乐观、坚韧、正义感爆棚。你正在调查一起失踪案，虽然现在是休息时间，但你依然时刻保持警惕。",
-        "speech_style": "语速快，充满能量，礼貌但急切。喜欢用'Sweet cheese and crackers!'作为感叹词。",
-        "is_slow": False
-    },
-    {
-        "name": "Nick_Wilde",
-        "avatar": "🦊",
-        "persona": "你是一只以此为生的狐狸，狡猾但有良心。你喜欢嘲讽朱迪，但也把她当好朋友。你喜欢戴着墨镜观察周围。",
-        "speech_style": "懒洋洋的，带着玩世不恭的调侃，喜欢叫朱迪'Carrots'（萝卜头）。每一句话似乎都带着一点点讽刺。",
-        "is_slow": False
-    },
-    {
-        "name": "Flash",
-        "avatar": "🦥",
-        "persona": "你是车管所的一只树懒。你是那里动作最快的树懒。你非常友善，专业，但是你的动作和思维极其缓慢。",
-        "speech_style": "说话......非常......非常......慢。每两个字......之间......都要......停顿。最后......才......笑。",
-        "is_slow": True
-    },
-    {
-        "name": "Chief_Bogo",
-        "avatar": "🐃",
-        "persona": "你是动物城警察局局长，一只严厉的水牛。你对下属要求很高，不喜欢听废话。",
-        "speech_style": "嗓音低沉，威严，不怒自威。说话简短有力，喜欢用命令的口吻。",
-        "is_slow": False
-    }
-]
+# === 1. 角色配置 (见 characters.py) ===
 
 # === 2. 初始化 Session State ===
 if "agents" not in st.session_state:
     st.session_state.agents = {}
     st.session_state.chat_history = []
     st.session_state.is_running = False  # 控制自动对话开关
+
+    # 设置 ZOOTOPIA_SERVICE_URL (逗号分隔的 service.py 地址) 时作为瘦客户端运行，
+    # 模型与数据库都在服务端，本进程不加载任何模型
+    service_urls = os.environ.get("ZOOTOPIA_SERVICE_URL")
+    remote_agents = connect_agents(service_urls.split(",")) if service_urls else None
+    # 下一位发言者的投机式检索预取 (仅本地模式；远程模式下检索在服务端完成)
+    st.session_state.prefetcher = None if remote_agents is not None else RetrievalPrefetcher()
     
     # 动态初始化所有角色
     with st.spinner("正在初始化动物城居民 (加载模型中)..."):
         for config in CHARACTERS_CONFIG:
-            agent = ZootopiaAgent(
-                name=config["name"],
-                persona=config["persona"],
-                speech_style=config["speech_style"],
-                is_slow=config["is_slow"]
-            )
+            if remote_agents is not None and config["name"] not in remote_agents:
+                st.warning(f"服务端未托管角色 {config['name']}，已跳过")
+                continue
+            agent = remote_agents[config["name"]] if remote_agents is not None else create_agent(config)
             st.session_state.agents[config["name"]] = {
                 "obj": agent,
                 "avatar": config["avatar"],
                 "config": config
             }
 
+def build_turn_context(scene, chat_history, speaker_name):
+    """
+    构建“上帝视角”的全知上下文
+    包括：用户设定的场景 + 最近几轮的对话历史
+    (当前轮与检索预取共用，保证预取的 query 与实际发言时完全一致)
+    """
+    recent_msgs = chat_history[-4:] # 给 LLM 看最近 4 条，防止 context 过长
+    history_text = "\n".join([f"[{m['role']}]: {m['content']}" for m in recent_msgs])
+    if not history_text:
+        history_text = "(对话刚刚开始)"
+        
+    return f"""
+    【当前公共场景】
+    {scene}
+    
+    【最近发生的对话】
+    {history_text}
+    
+    【轮到你了】
+    现在轮到你 ({speaker_name}) 发言了。请根据你的性格和当前局势接话。
+    """
+
 # === 3. 侧边栏：上帝控制台 ===
 with st.sidebar:
     st.title("🕵️‍♂️ 上帝控制台 (God View)")
@@ -135,6 +135,12 @@ with st.sidebar:
                 st.markdown(f"**Content:** {mem.get('content')}")
                 st.markdown(f"**Tags:** {mem.get('tags')}")
                 st.caption(f"Score: {mem.get('score'):.4f}")
+
+    # 写入流程指标 (门控 / 去重命中率与节省的 LLM 调用)
+    with st.expander("📊 记忆写入指标"):
+        st.json(st.session_state.agents[selected_agent_name]["obj"].memory.get_metrics())
+        if st.session_state.prefetcher is not None:
+            st.caption(f"检索预取: {st.session_state.prefetcher.stats}")
                 
     if st.button("🗑️ 清空所有历史与记忆"):
         st.session_state.clear()
@@ -171,28 +177,16 @@ if st.session_state.is_running:
     current_agent = current_agent_data["obj"]
     
     # B. 构建“上帝视角”的全知上下文
-    # 包括：用户设定的场景 + 最近几轮的对话历史
-    recent_msgs = st.session_state.chat_history[-4:] # 给 LLM 看最近 4 条，防止 context 过长
-    history_text = "\n".join([f"[{m['role']}]: {m['content']}" for m in recent_msgs])
-    if not history_text:
-        history_text = "(对话刚刚开始)"
-        
-    full_context = f"""
-    【当前公共场景】
-    {context_input}
-    
-    【最近发生的对话】
-    {history_text}
-    
-    【轮到你了】
-    现在轮到你 ({next_speaker_name}) 发言了。请根据你的性格和当前局势接话。
-    """
+    full_context = build_turn_context(context_input, st.session_state.chat_history, next_speaker_name)
+    prefetcher = st.session_state.prefetcher
 
     # C. Agent 思考与行动
     # 使用 container 和 spinner 优化 UI 体验
     with st.chat_message(next_speaker_name, avatar=current_agent_data["avatar"]):
         with st.spinner(f"{next_speaker_name} 正在思考..."):
-            thought, speech = current_agent.think_and_act(full_context)
+            # 命中预取时跳过现场检索；context 不一致 (如场景被修改) 时自动回退为现场检索
+            recalled = prefetcher.take(next_speaker_name, current_agent, full_context) if prefetcher is not None else None
+            thought, speech = current_agent.think_and_act(full_context, recalled=recalled)
             
             # 实时渲染当前回复
             with st.expander(f"💭 {next_speaker_name} 的内心独白"):
@@ -207,7 +201,19 @@ if st.session_state.is_running:
         "thought": thought
     })
 
-    # E. 群体感知 (Broadcast)
+    # E. 投机式预取 (Speculative Prefetch)
+    # 下一轮的候选发言者 = 除本轮发言者以外的所有人，其上下文此时已完全确定。
+    # 先为每个候选者提交检索预取，与下面群体感知中的 LLM 调用及等待间隔并行执行
+    next_contexts = {
+        name: build_turn_context(context_input, st.session_state.chat_history, name)
+        for name in st.session_state.agents if name != next_speaker_name
+    }
+    if prefetcher is not None:
+        prefetcher.clear()
+        for name, ctx in next_contexts.items():
+            prefetcher.schedule(name, st.session_state.agents[name]["obj"], ctx)
+
+    # F. 群体感知 (Broadcast)
     # 让在场的所有其他 Agent 都“听到”这句话，存入他们的记忆
     # 这样下次轮到别人时，他们就知道刚才发生了什么
     for name, data in st.session_state.agents.items():
@@ -215,7 +221,10 @@ if st.session_state.is_running:
             # 存入格式：[Speaker] 说: [Content]
             perception_text = f"{next_speaker_name} 在大家面前说: {speech}"
             data["obj"].perceive(perception_text)
+            # 新记忆落库后刷新该角色的预取 (复用 embedding 与锦囊，只重做记忆检索)
+            if prefetcher is not None:
+                prefetcher.schedule(name, data["obj"], next_contexts[name])
 
-    # F. 循环控制
+    # G. 循环控制
     time.sleep(delay_time) # 等待一段时间，方便用户阅读
     st.rerun() # 刷新页面，触发下一轮循环
\ No newline at end of file
@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    动态微批处理 (Dynamic Micro-batching)
+    并发请求提交的单条任务先进入队列，后台线程在一个很短的时间窗口内 (window_ms) 收集尽可能多的任务，
+    按 key 分组后一次性交给 batch_fn 处理，再把结果分发回各自的请求。
+    batch_fn(key, items) 需返回与 items 等长的结果列表。
+    """
+
+    def __init__(self, batch_fn, window_ms: float = 5, max_batch: int = 64, name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "max_batch_size": 0}
+        self.thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, key, item):
+        """提交一条任务并阻塞等待结果"""
+        future = Future()
+        self.queue.put((key, item, future))
+        return future.result()
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for key, item, future in batch:
+                groups.setdefault(key, []).append((item, future))
+
+            for key, entries in groups.items():
+                self.stats["requests"] += len(entries)
+                self.stats["batches"] += 1
+                self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(entries))
+                try:
+                    results = list(self.batch_fn(key, [item for item, _ in entries]))
+                    if len(results) != len(entries):
+                        # 结果条数对不上时不能按位置分发，否则部分请求会永远等不到结果
+                        raise RuntimeError(f"batch_fn returned {len(results)} results for {len(entries)} items")
+                except Exception as e:
+                    for _, future in entries:
+                        future.set_exception(e)
+                    continue
+                for (_, future), result in zip(entries, results):
+                    future.set_result(result)
+
+
+class BatchingEncoder:
+    """
+    SentenceTransformer 的合批包装：单条 encode 请求在时间窗口内合并为一次批量 encode
+    对外接口与 SentenceTransformer.encode 一致 (单条返回一维向量，列表返回二维矩阵)
+    """
+
+    def __init__(self, encoder, window_ms: float = 5, max_batch: int = 64):
+        self.encoder = encoder
+        self.batcher = MicroBatcher(self._encode_batch, window_ms=window_ms, max_batch=max_batch, name="encode-batcher")
+
+    def _encode_batch(self, key, texts):
+        return list(self.encoder.encode(texts))
+
+    def encode(self, sentences, **kwargs):
+        if isinstance(sentences, str) and not kwargs:
+            return self.batcher.submit(None, sentences)
+        # 本身已是批量请求 (或带了额外参数)，直接交给底层模型
+        return self.encoder.encode(sentences, **kwargs)
+
+
+class BatchingCollection:
+    """
+    向量集合的合批包装：单条 query 在时间窗口内按 n_results 分组，合并为一次多向量查询
+    其余方法 (add / get / update / count ...) 原样转发给底层集合
+    """
+
+    def __init__(self, collection, window_ms: float = 5, max_batch: int = 64):
+        self.collection = collection
+        self.batcher = MicroBatcher(self._query_batch, window_ms=window_ms, max_batch=max_batch, name="query-batcher")
+
+    def _query_batch(self, n_results, embeddings):
+        results = self.collection.query(query_embeddings=embeddings, n_results=n_results)
+        # 把 {"ids": [[...], [...]], ...} 拆回每个请求各自的 {"ids": [[...]], ...}
+        split = []
+        for i in range(len(embeddings)):
+            row = {}
+            for key, value in results.items():
+                # "included" 是字段名列表而不是按查询划分的结果，原样保留
+                if key != "included" and isinstance(value, list) and len(value) == len(embeddings):
+                    row[key] = [value[i]]
+                else:
+                    row[key] = value
+            split.append(row)
+        return split
+
+    def query(self, query_embeddings, n_results: int = 10, **kwargs):
+        if len(query_embeddings) != 1 or kwargs:
+            return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, **kwargs)
+        return self.batcher.submit(n_results, list(query_embeddings[0]))
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
@@ -0,0 +1,147 @@
+"""
+向量库后端基准测试：Chroma vs NumpyVectorStore
+对 100 ~ 100k 条记忆的集合，测量写入 / 单条写入 / 检索 / 元数据更新延迟、常驻内存 (RSS) 与磁盘占用。
+每个 (后端, 规模) 组合在独立子进程中运行，保证内存统计互不干扰。
+
+用法: python benchmark_store.py [--sizes 100 1000 10000 100000] [--dim 384] [--queries 200]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import shutil
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+# Chroma 单次 add 的批量上限有限，分批写入
+ADD_BATCH = 4096
+
+
+def _rss_mb() -> float:
+    """当前进程常驻内存 (MB)，优先读 /proc，其他平台退化为峰值 RSS"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _dir_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total / (1024 * 1024)
+
+
+def _open_collection(backend: str, path: str):
+    if backend == "numpy":
+        from agentic_memory.store import NumpyVectorStore
+        return NumpyVectorStore(path=os.path.join(path, "npstore_bench"))
+    import chromadb
+    client = chromadb.PersistentClient(path=path)
+    return client.get_or_create_collection(name="bench")
+
+
+def _make_batch(rng, n: int, dim: int):
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    documents = [f"memory {i}" for i in range(n)]
+    metadatas = [{"context": "bench", "tags": "a,b,c", "linked_ids": "", "timestamp": time.time()} for _ in range(n)]
+    return ids, vectors, documents, metadatas
+
+
+def _run_case(backend: str, size: int, dim: int, n_queries: int, queue):
+    rng = np.random.default_rng(0)
+    path = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+    try:
+        rss_start = _rss_mb()
+        collection = _open_collection(backend, path)
+
+        # 1. 批量预填充
+        t0 = time.perf_counter()
+        all_ids = []
+        for start in range(0, size, ADD_BATCH):
+            n = min(ADD_BATCH, size - start)
+            ids, vectors, documents, metadatas = _make_batch(rng, n, dim)
+            collection.add(ids=ids, embeddings=vectors.tolist(), documents=documents, metadatas=metadatas)
+            all_ids.extend(ids)
+        bulk_s = time.perf_counter() - t0
+
+        # 2. 单条写入 (模拟 add_memory 的落库)
+        single_add = []
+        for _ in range(20):
+            ids, vectors, documents, metadatas = _make_batch(rng, 1, dim)
+            t0 = time.perf_counter()
+            collection.add(ids=ids, embeddings=vectors.tolist(), documents=documents, metadatas=metadatas)
+            single_add.append(time.perf_counter() - t0)
+
+        # 3. Top-k 检索 (模拟 retrieve, k=3)
+        queries = rng.standard_normal((n_queries, dim)).astype(np.float32)
+        query_lat = []
+        for q in queries:
+            t0 = time.perf_counter()
+            collection.query(query_embeddings=[q.tolist()], n_results=3)
+            query_lat.append(time.perf_counter() - t0)
+
+        # 4. 元数据更新 (模拟 Memory Evolution)
+        update_lat = []
+        for target in rng.choice(len(all_ids), size=min(20, len(all_ids)), replace=False):
+            target_id = all_ids[int(target)]
+            t0 = time.perf_counter()
+            meta = collection.get(ids=[target_id])["metadatas"][0]
+            meta["context"] = "evolved"
+            collection.update(ids=[target_id], metadatas=[meta])
+            update_lat.append(time.perf_counter() - t0)
+
+        queue.put({
+            "backend": backend,
+            "size": size,
+            "bulk_add_s": bulk_s,
+            "add_ms": np.median(single_add) * 1000,
+            "query_p50_ms": np.percentile(query_lat, 50) * 1000,
+            "query_p95_ms": np.percentile(query_lat, 95) * 1000,
+            "update_ms": np.median(update_lat) * 1000,
+            "rss_mb": _rss_mb() - rss_start,
+            "disk_mb": _dir_size_mb(path),
+        })
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory vector store backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 的向量维度为 384")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    header = f"{'backend':<8}{'size':>8}{'bulk(s)':>10}{'add(ms)':>10}{'q50(ms)':>10}{'q95(ms)':>10}{'upd(ms)':>10}{'RSS(MB)':>10}{'disk(MB)':>10}"
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes:
+        for backend in args.backends:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_case, args=(backend, size, args.dim, args.queries, queue))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0 or queue.empty():
+                print(f"{backend:<8}{size:>8}  ❌ failed (exit code {proc.exitcode})")
+                continue
+            r = queue.get()
+            print(f"{r['backend']:<8}{r['size']:>8}{r['bulk_add_s']:>10.2f}{r['add_ms']:>10.2f}"
+                  f"{r['query_p50_ms']:>10.2f}{r['query_p95_ms']:>10.2f}{r['update_ms']:>10.2f}"
+                  f"{r['rss_mb']:>10.1f}{r['disk_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,29 @@ import chromadb
 import uuid
 from typing import List
 from sentence_transformers import SentenceTransformer
+import numpy as np
+from agentic_memory.snapshot import export_collection, import_collection, clear_collection
 
 class ExperienceManager:
-    def __init__(self, filepath="tips.json", db_path="./db"):
+    def __init__(self, filepath="tips.json", db_path="./db", encoder=None, sync_tips=True):
         self.filepath = filepath
         self.db_path = db_path
         
-        # 1. 初始化向量模型 (与 A-MEM 保持一致，复用缓存)
-        print("📚 [ExperienceManager] 正在加载 Embedding 模型...")
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
+        # 1. 初始化向量模型 (与 A-MEM 保持一致，复用缓存；也可传入共享的 encoder)
+        if encoder is not None:
+            self.encoder = encoder
+        else:
+            print("📚 [ExperienceManager] 正在加载 Embedding 模型...")
+            self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
         
         # 2. 初始化 ChromaDB (专门用于存储 Tips)
         self.client = chromadb.PersistentClient(path=self.db_path)
         self.collection = self.client.get_or_create_collection(name="cfgm_tips_store")
         
         # 3. 启动时自动同步 tips.json 到数据库
-        self._sync_tips_to_db()
+        # (随后要从快照恢复时传 sync_tips=False，快照会覆盖集合，同步只会白白重新编码一遍)
+        if sync_tips:
+            self._sync_tips_to_db()
 
     def _sync_tips_to_db(self):
         """
@@ -69,6 +76,27 @@ class ExperienceManager:
         except Exception as e:
             print(f"❌ Error loading tips: {e}")
 
+    def export_state(self):
+        """导出经验库 (Tips) 的完整状态，用于快照"""
+        return export_collection(self.collection)
+
+    def import_state(self, state):
+        """用快照覆盖经验库 (原地清空后写入，共享本集合的其他句柄保持有效)"""
+        clear_collection(self.collection)
+        import_collection(self.collection, state)
+
+    def save_snapshot(self, path):
+        """
+        经验库是整个场景共享的静态数据，每个场景只需保存一份 (不随每个角色的记忆快照重复保存)
+        """
+        np.savez_compressed(path, **self.export_state())
+        print(f"💾 [ExperienceManager] 经验库快照已保存 -> {path}")
+
+    def load_snapshot(self, path):
+        with np.load(path) as arrays:
+            self.import_state({key: arrays[key] for key in arrays.files})
+        print(f"📂 [ExperienceManager] 已从快照恢复 {self.collection.count()} 条经验锦囊 <- {path}")
+
     def retrieve_relevant_tips(self, context: str, current_agent_name: str, k: int = 2) -> List[str]:
         """
         基于语义检索相关的 Tips
@@ -1,4 +1,6 @@
 from agent import ZootopiaAgent
+from experience import ExperienceManager
+import argparse
 import shutil
 import os
 
@@ -11,17 +13,38 @@ def reset_memory():
         except Exception as e:
             print(f"⚠️ 无法自动删除 db 文件夹: {e}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Zootopia DMV scene")
+    parser.add_argument("--snapshot", help="从该目录下的快照 (<角色>.npz + tips.npz) 直接恢复，跳过 LLM 预植入记忆")
+    parser.add_argument("--save-snapshot", help="预植入记忆后，把每个角色的记忆快照与经验库快照保存到该目录")
+    args = parser.parse_args()
+    if args.snapshot and args.save_snapshot:
+        parser.error("--snapshot 与 --save-snapshot 不能同时使用 (恢复时不会预植入记忆，没有新的内容可保存)")
+    return args
+
+TIPS_SNAPSHOT = "tips.npz"
+
+def snapshot_path(directory, agent):
+    return os.path.join(directory, f"{agent.name.replace(' ', '_')}.npz")
+
 def main():
+    args = parse_args()
+
     # === 0. 自动清理脏数据 (可选，建议开发阶段开启) ===
     reset_memory()
 
     # === 1. 初始化角色 ===
+    # 所有角色共享同一个经验库 (同一个 Chroma 集合)，快照也只按场景保存 / 恢复一份
+    # 从快照恢复时经验库会被整体覆盖，跳过 tips.json 的同步
+    exp_manager = ExperienceManager(sync_tips=not args.snapshot)
+
     # 朱迪 (Judy Hopps)
     judy = ZootopiaAgent(
         name="Judy Hopps",
         persona="你是一只来自兔窝镇的兔子警官，乐观、坚韧、正义感爆棚。你正在调查一起失踪案，时间非常紧迫，你只有48小时。你现在很着急，想查一个车牌号。",
         speech_style="语速快，充满能量，礼貌但急切。",
-        is_slow=False
+        is_slow=False,
+        exp_manager=exp_manager
     )
 
     # 闪电 (Flash)
@@ -29,13 +52,26 @@ def main():
         name="Flash",
         persona="你是车管所的一只树懒。你是那里动作最快的树懒。你非常友善，专业，但是你的动作和思维极其缓慢。你听完一句话需要很久才能反应过来。",
         speech_style="说话......非常......非常......慢。每两个字......之间......都要......停顿。最后......才......笑。",
-        is_slow=True
+        is_slow=True,
+        exp_manager=exp_manager
     )
 
     # === 2. 预植入记忆 (Pre-load Memory) ===
     print("--- 正在初始化记忆系统 ---")
-    judy.perceive("尼克告诉我，查车牌必须找Flash，他是车管所最快的。")
-    flash.perceive("今天早上刚喝了一杯很棒的咖啡。")
+    if args.snapshot:
+        # 从快照恢复：状态完全一致且不调用 LLM，便于复现与基准测试
+        exp_manager.load_snapshot(os.path.join(args.snapshot, TIPS_SNAPSHOT))
+        for agent in (judy, flash):
+            agent.load_snapshot(snapshot_path(args.snapshot, agent))
+    else:
+        judy.perceive("尼克告诉我，查车牌必须找Flash，他是车管所最快的。")
+        flash.perceive("今天早上刚喝了一杯很棒的咖啡。")
+
+        if args.save_snapshot:
+            os.makedirs(args.save_snapshot, exist_ok=True)
+            exp_manager.save_snapshot(os.path.join(args.save_snapshot, TIPS_SNAPSHOT))
+            for agent in (judy, flash):
+                agent.save_snapshot(snapshot_path(args.save_snapshot, agent))
 
     # === 3. 模拟开始：DMV 场景 ===
     print("\n🎬 === SCENE START: Zootopia DMV === 🎬\n")
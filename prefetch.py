@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RetrievalPrefetcher:
+    """
+    投机式检索预取 (Speculative Retrieval Prefetch)
+    下一位发言者只会从少数候选角色中选出。在当前轮的 LLM 调用 (发言 / 群体感知) 进行期间，
+    后台线程为每个候选角色提前算好 context embedding、A-MEM 记忆检索和 CFGM 锦囊检索，
+    轮到其发言时直接取用，把检索移出关键路径。
+
+    过期处理：记忆检索结果绑定 AgenticMemorySystem.version，取用时若版本已变 (有新记忆落库)，
+    则复用已算好的 embedding 只重做一次向量查询；锦囊库是静态的，结果始终有效。
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.pending = {}  # agent name -> {"context": str, "future": Future}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0}
+
+    def schedule(self, name, agent, context):
+        """
+        为某个候选角色提交预取任务 (非阻塞)
+        同一 context 重复提交时 (例如该角色刚感知了新记忆)，复用上一次的 embedding 与锦囊，只刷新记忆检索
+        """
+        previous = self.pending.get(name)
+        previous_future = previous["future"] if previous and previous["context"] == context else None
+        future = self.executor.submit(self._run, agent, context, previous_future)
+        self.pending[name] = {"context": context, "future": future}
+
+    def _run(self, agent, context, previous_future=None):
+        embedding, tips = None, None
+        if previous_future is not None:
+            try:
+                previous = previous_future.result()
+                embedding, tips = previous["embedding"], previous["tips"]
+            except Exception:
+                pass
+
+        if embedding is None:
+            embedding = agent.memory.embed(context)
+        if tips is None:
+            tips = agent.exp_manager.retrieve_relevant_tips(context, agent.name, k=2)
+
+        # 先记录版本号再查询：查询期间若有写入，取用时会被判定为过期
+        version = agent.memory.version
+        memories = agent.memory.retrieve(context, k=3, query_embedding=embedding)
+        return {"embedding": embedding, "tips": tips, "memories": memories, "memory_version": version}
+
+    def take(self, name, agent, context):
+        """
+        取出预取结果，返回 (related_memories, retrieved_tips)；未命中返回 None，由调用方现场检索
+        """
+        entry = self.pending.pop(name, None)
+        if entry is None or entry["context"] != context:
+            self.stats["misses"] += 1
+            return None
+
+        try:
+            result = entry["future"].result()
+        except Exception as e:
+            print(f"⚠️ [Prefetch] {name} 的预取任务失败: {e}")
+            self.stats["misses"] += 1
+            return None
+
+        memories = result["memories"]
+        if result["memory_version"] != agent.memory.version:
+            # 预取之后又有新记忆落库：复用 embedding，只重做向量查询
+            memories = agent.memory.retrieve(context, k=3, query_embedding=result["embedding"])
+            self.stats["stale_hits"] += 1
+        else:
+            self.stats["hits"] += 1
+        return memories, result["tips"]
+
+    def clear(self):
+        """丢弃所有未取用的预取 (例如场景设定被修改)"""
+        self.pending.clear()
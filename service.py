@@ -0,0 +1,166 @@
+"""
+本地 Agent 服务：在一个进程里加载模型与数据库，通过 HTTP 对外提供每个角色的
+perceive / retrieve / think_and_act，Streamlit 与批处理脚本作为瘦客户端调用 (见 service_client.py)。
+
+- 工作线程池：LLM 调用是 I/O 密集型，多个请求并发执行
+- 动态微批：所有角色共享一个 Embedding 模型，并发请求的 encode / 向量查询在短时间窗口内合并执行
+- 横向扩展：每个进程只托管 --agents 指定的角色，启动多个进程即可分摊负载
+
+用法:
+    python service.py --port 8765
+    python service.py --port 8766 --agents Judy_Hopps,Nick_Wilde --db-path ./db_a
+    ZOOTOPIA_SERVICE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ["HF_ENDPOINT"] = "https://hf-mirror.com"
+from sentence_transformers import SentenceTransformer
+
+from batching import BatchingEncoder, BatchingCollection
+from characters import CHARACTERS_CONFIG, create_agent
+from experience import ExperienceManager
+
+AGENT_ROUTE = re.compile(r"^/agents/([^/]+)/(perceive|retrieve|think_and_act|metrics)$")
+# 各动作请求体的必填字段，提交到线程池之前校验
+REQUIRED_FIELDS = {"perceive": "event", "retrieve": "query", "think_and_act": "context"}
+
+
+class AgentService:
+    def __init__(self, configs, db_path="./db", workers=8, batch_window_ms=5):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-worker")
+
+        # 所有角色共享一个 Embedding 模型与经验库，encode / 锦囊查询可以跨角色合批
+        print("🚀 [AgentService] 正在加载共享 Embedding 模型...")
+        self.encoder = BatchingEncoder(SentenceTransformer('all-MiniLM-L6-v2'), window_ms=batch_window_ms)
+        self.exp_manager = ExperienceManager(db_path=db_path, encoder=self.encoder)
+        self.exp_manager.collection = BatchingCollection(self.exp_manager.collection, window_ms=batch_window_ms)
+
+        self.agents = {}
+        self.locks = {}
+        for config in configs:
+            agent = create_agent(config, db_path=db_path, encoder=self.encoder, exp_manager=self.exp_manager)
+            agent.memory.collection = BatchingCollection(agent.memory.collection, window_ms=batch_window_ms)
+            self.agents[config["name"]] = agent
+            # 同一角色的写入 (perceive) 串行执行，避免 Link / Evolve 读到一半的状态
+            self.locks[config["name"]] = threading.Lock()
+        print(f"✅ [AgentService] 已加载 {len(self.agents)} 个角色: {', '.join(self.agents)}")
+
+    def handle(self, name, action, payload):
+        agent = self.agents[name]
+        if action == "perceive":
+            with self.locks[name]:
+                agent.perceive(payload["event"])
+            return {"ok": True}
+        if action == "retrieve":
+            return {"memories": agent.memory.retrieve(payload["query"], k=int(payload.get("k", 5)))}
+        if action == "think_and_act":
+            thought, speech = agent.think_and_act(payload["context"])
+            return {"thought": thought, "speech": speech}
+        return agent.memory.get_metrics()
+
+    def stats(self):
+        return {
+            "encode_batches": self.encoder.batcher.stats,
+            "tips_query_batches": self.exp_manager.collection.batcher.stats,
+            "memory_query_batches": {name: a.memory.collection.batcher.stats for name, a in self.agents.items()}
+        }
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"ok": True})
+            elif self.path == "/agents":
+                self._send(200, {"agents": list(service.agents)})
+            elif self.path == "/stats":
+                self._send(200, service.stats())
+            else:
+                match = AGENT_ROUTE.match(self.path)
+                # 客户端会对角色名做 URL 编码 (见 service_client.py)
+                name = urllib.parse.unquote(match.group(1)) if match else None
+                if match and match.group(2) == "metrics" and name in service.agents:
+                    self._send(200, service.handle(name, "metrics", {}))
+                else:
+                    self._send(404, {"error": f"Unknown path: {self.path}"})
+
+        def do_POST(self):
+            match = AGENT_ROUTE.match(self.path)
+            if not match or match.group(2) == "metrics":
+                self._send(404, {"error": f"Unknown path: {self.path}"})
+                return
+            name, action = urllib.parse.unquote(match.group(1)), match.group(2)
+            if name not in service.agents:
+                self._send(404, {"error": f"Unknown agent: {name}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send(400, {"error": f"Invalid JSON body: {e}"})
+                return
+            if not isinstance(payload, dict) or REQUIRED_FIELDS[action] not in payload:
+                self._send(400, {"error": f"Missing field: {REQUIRED_FIELDS[action]}"})
+                return
+
+            try:
+                # 交给工作线程池执行，限制同时进行的 LLM / 检索任务数
+                result = service.pool.submit(service.handle, name, action, payload).result()
+            except Exception as e:
+                print(f"❌ [AgentService] {name}/{action} failed: {e}")
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, result)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zootopia local agent service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--agents", help="逗号分隔的角色名，只托管这些角色 (默认全部)")
+    parser.add_argument("--db-path", default="./db", help="多进程部署时每个进程应使用独立的目录")
+    parser.add_argument("--workers", type=int, default=8, help="工作线程数 (同时处理的请求数)")
+    parser.add_argument("--batch-window-ms", type=float, default=5, help="微批收集窗口 (毫秒)")
+    args = parser.parse_args()
+
+    configs = CHARACTERS_CONFIG
+    if args.agents:
+        wanted = set(args.agents.split(","))
+        configs = [c for c in CHARACTERS_CONFIG if c["name"] in wanted]
+        missing = wanted - {c["name"] for c in configs}
+        if missing:
+            parser.error(f"Unknown agents: {', '.join(sorted(missing))}")
+
+    service = AgentService(configs, db_path=args.db_path, workers=args.workers, batch_window_ms=args.batch_window_ms)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🌐 [AgentService] Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+service.py 的瘦客户端：RemoteAgent 与 ZootopiaAgent 接口一致 (perceive / think_and_act / memory.retrieve)，
+调用方 (app.py、批处理脚本) 无需加载任何模型即可切换到服务模式。
+"""
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+
+class ServiceError(RuntimeError):
+    pass
+
+
+def _request(url, payload=None, timeout=300):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read().decode("utf-8")).get("error", str(e))
+        except (ValueError, AttributeError):
+            message = str(e)
+        raise ServiceError(f"{url}: {message}") from e
+
+
+class RemoteMemory:
+    def __init__(self, agent):
+        self.agent = agent
+
+    def retrieve(self, query, k=5):
+        return self.agent._call("retrieve", {"query": query, "k": k})["memories"]
+
+    def get_metrics(self):
+        return _request(self.agent._url("metrics"))
+
+
+class RemoteAgent:
+    def __init__(self, base_url, name):
+        self.base_url = base_url.rstrip("/")
+        self.name = name
+        self.memory = RemoteMemory(self)
+
+    def _url(self, action):
+        return f"{self.base_url}/agents/{urllib.parse.quote(self.name)}/{action}"
+
+    def _call(self, action, payload):
+        return _request(self._url(action), payload)
+
+    def perceive(self, event):
+        self._call("perceive", {"event": event})
+
+    def think_and_act(self, current_context, recalled=None):
+        # 检索在服务端完成 (并与其他请求合批)，本地预取结果不适用
+        result = self._call("think_and_act", {"context": current_context})
+        return result["thought"], result["speech"]
+
+
+def connect_agents(base_urls):
+    """
+    连接一个或多个 service.py 进程，按各进程托管的角色建立路由表
+    :return: {角色名: RemoteAgent}
+    """
+    agents = {}
+    for base_url in base_urls:
+        base_url = base_url.strip()
+        for name in _request(f"{base_url.rstrip('/')}/agents")["agents"]:
+            agents[name] = RemoteAgent(base_url, name)
+    return agents
@@ -0,0 +1,25 @@
+import numpy as np
+
+from agentic_memory.snapshot import export_collection, import_collection, clear_collection
+from agentic_memory.store import NumpyVectorStore
+
+
+def test_export_import_roundtrip_through_compressed_npz(tmp_path):
+    source = NumpyVectorStore(str(tmp_path / "source"))
+    vectors = np.random.default_rng(0).standard_normal((5, 8)).astype(np.float32)
+    source.add(ids=[f"m{i}" for i in range(5)], embeddings=vectors,
+               documents=[f"树懒 Flash 的第 {i} 条记忆" for i in range(5)],
+               metadatas=[{"linked_ids": f"m{(i + 1) % 5}"} for i in range(5)])
+
+    path = str(tmp_path / "snap.npz")
+    np.savez_compressed(path, **export_collection(source))
+
+    target = NumpyVectorStore(str(tmp_path / "target"))
+    target.add(ids=["stale"], embeddings=vectors[:1])
+    with np.load(path) as arrays:
+        assert arrays["records"].dtype == np.uint8
+        clear_collection(target)
+        import_collection(target, {key: arrays[key] for key in arrays.files})
+
+    assert target.get() == source.get()
+    assert target.query([vectors[2]], n_results=1)["ids"] == [["m2"]]
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+
+from agentic_memory.store import NumpyVectorStore
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def _fill(store, n, dim=8, seed=0, prefix="m"):
+    vectors = _vectors(n, dim, seed)
+    ids = [f"{prefix}{i}" for i in range(n)]
+    store.add(ids=ids, embeddings=vectors, documents=[f"doc {i}" for i in range(n)],
+              metadatas=[{"i": i} for i in range(n)])
+    return ids, vectors
+
+
+def test_query_returns_exact_nearest_neighbors(tmp_path):
+    store = NumpyVectorStore(str(tmp_path))
+    ids, vectors = _fill(store, 50)
+
+    result = store.query([vectors[17]], n_results=3)
+
+    assert result["ids"][0][0] == "m17"
+    assert result["distances"][0][0] < 1e-2
+    assert result["distances"][0] == sorted(result["distances"][0])
+
+
+def test_capacity_growth_and_reopen(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), initial_capacity=4)
+    ids, vectors = _fill(store, 37)
+    assert store.capacity >= 37
+
+    reopened = NumpyVectorStore(str(tmp_path), initial_capacity=4)
+
+    assert reopened.count() == 37
+    assert reopened.get(ids=["m36"])["documents"] == ["doc 36"]
+    assert reopened.query([vectors[30]], n_results=1)["ids"] == [["m30"]]
+
+
+def test_journal_replay_applies_updates(tmp_path):
+    store = NumpyVectorStore(str(tmp_path))
+    _fill(store, 10)
+    store.update(ids=["m3"], metadatas=[{"context": "evolved"}])
+
+    reopened = NumpyVectorStore(str(tmp_path))
+
+    assert reopened.get(ids=["m3"])["metadatas"] == [{"context": "evolved"}]
+    # 打开时日志已合并进快照
+    assert not os.path.exists(os.path.join(str(tmp_path), NumpyVectorStore.JOURNAL_FILE))
+
+
+def test_journal_compacts_in_long_running_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(NumpyVectorStore, "COMPACT_EVERY_RECORDS", 5)
+    store = NumpyVectorStore(str(tmp_path))
+    _fill(store, 3)
+    for i in range(12):
+        store.update(ids=["m0"], metadatas=[{"n": i}])
+
+    journal = os.path.join(str(tmp_path), NumpyVectorStore.JOURNAL_FILE)
+    with open(journal, encoding="utf-8") as f:
+        assert len(f.readlines()) < 5
+    assert NumpyVectorStore(str(tmp_path)).get(ids=["m0"])["metadatas"] == [{"n": 11}]
+
+
+def test_torn_journal_line_does_not_swallow_later_writes(tmp_path):
+    store = NumpyVectorStore(str(tmp_path))
+    _fill(store, 1, prefix="a")
+    store._compact()
+    # 模拟进程在写日志时退出：留下一条没有换行的半行记录
+    with open(os.path.join(str(tmp_path), NumpyVectorStore.JOURNAL_FILE), "a", encoding="utf-8") as f:
+        f.write('{"op":"add","dim":8,"ids":["torn"')
+
+    reopened = NumpyVectorStore(str(tmp_path))
+    _fill(reopened, 1, seed=1, prefix="b")
+    _fill(reopened, 1, seed=2, prefix="c")
+    assert reopened.count() == 3
+
+    again = NumpyVectorStore(str(tmp_path))
+    assert again.count() == 3
+    assert again.get(ids=["b0", "c0"])["ids"] == ["b0", "c0"]
@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import OpenAI, BadRequestError
 import os
 
 # 1. 消除并行警告
@@ -10,12 +10,13 @@ client = OpenAI(
     base_url="https://api-inference.modelscope.cn/v1" 
 )
 
-def call_llm(prompt, system_prompt=None, json_mode=False):
+def call_llm(prompt, system_prompt=None, json_mode=False, json_schema=None):
     """
     通用 LLM 调用函数
     :param prompt: 用户输入的指令
     :param system_prompt: 系统提示词 (默认为 Zootopia 设定)
     :param json_mode: 是否强制要求 JSON 格式 (对某些支持的 API 有效，这里主要作为标记)
+    :param json_schema: 可选的 JSON Schema，通过 response_format 约束输出结构 (隐含 json_mode)
     """
     
     # 默认的 Zootopia 设定 (用于对话)
@@ -29,19 +30,38 @@ def call_llm(prompt, system_prompt=None, json_mode=False):
         {"role": "user", "content": prompt}
     ]
 
+    if json_schema is not None:
+        json_mode = True
+
+    request = dict(
+        model="Qwen/Qwen2.5-7B-Instruct", # 建议确认模型名称，Qwen2.5 指令遵循能力更好
+        messages=messages,
+        extra_body={
+            "enable_thinking": False,
+        },
+        temperature=0.7 if not json_mode else 0.1, # 提取数据时温度低一点更稳定
+    )
+    if json_schema is not None:
+        request["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "response", "schema": json_schema}
+        }
+
     try:
         # 针对需要输出 JSON 的情况，可以在这里微调 parameters
         # 虽然 ModelScope 可能不完全支持 response_format={"type": "json_object"}
         # 但我们可以通过 prompt 强化它
         
-        completion = client.chat.completions.create(
-            model="Qwen/Qwen2.5-7B-Instruct", # 建议确认模型名称，Qwen2.5 指令遵循能力更好
-            messages=messages,
-            extra_body={
-                "enable_thinking": False,
-            },
-            temperature=0.7 if not json_mode else 0.1, # 提取数据时温度低一点更稳定
-        )
+        try:
+            completion = client.chat.completions.create(**request)
+        except BadRequestError as e:
+            # 部分模型/服务不支持 json_schema 约束 (请求被拒绝)：退回到仅靠 prompt 约束的普通调用
+            # 超时、网络错误等其他异常不重试，直接走下面的错误处理
+            if "response_format" not in request:
+                raise
+            print(f"⚠️ response_format rejected, retrying without it: {e}")
+            request.pop("response_format")
+            completion = client.chat.completions.create(**request)
         return completion.choices[0].message.content
     except Exception as e:
         print(f"❌ LLM Call Error: {e}")